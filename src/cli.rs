@@ -75,7 +75,7 @@ async fn run_cli_at_path(
 ) -> Result<String, CliError> {
     let output = run_cli_process(cli_path, args, working_dir, false).await?;
     if output.status.success() {
-        return Ok(String::from_utf8_lossy(&output.stdout).to_string());
+        return Ok(output_to_string(output.stdout));
     }
 
     let stderr = String::from_utf8_lossy(&output.stderr).to_string();
@@ -89,7 +89,7 @@ async fn run_cli_at_path(
         tokio::time::sleep(std::time::Duration::from_millis(500)).await;
         let retry_output = run_cli_process(cli_path, args, working_dir, false).await?;
         if retry_output.status.success() {
-            return Ok(String::from_utf8_lossy(&retry_output.stdout).to_string());
+            return Ok(output_to_string(retry_output.stdout));
         }
         return parse_cli_output(retry_output);
     }
@@ -404,11 +404,17 @@ fn is_license_check_failure(stderr: &str) -> bool {
     stderr.contains("License check failed")
 }
 
+/// Convert captured CLI output into a `String`, reusing the buffer when it
+/// is valid UTF-8 (the common case) instead of copying it.
+fn output_to_string(bytes: Vec<u8>) -> String {
+    String::from_utf8(bytes).unwrap_or_else(|e| String::from_utf8_lossy(e.as_bytes()).into_owned())
+}
+
 fn parse_cli_output(output: Output) -> Result<String, CliError> {
     if output.status.success() {
-        Ok(String::from_utf8_lossy(&output.stdout).to_string())
+        Ok(output_to_string(output.stdout))
     } else {
-        let stderr = String::from_utf8_lossy(&output.stderr).to_string();
+        let stderr = output_to_string(output.stderr);
         if is_license_check_failure(&stderr) {
             return Err(CliError::LicenseCheckFailed { stderr });
         }
@@ -749,6 +755,26 @@ mod tests {
         assert_eq!(cs_args, vec!["review".to_string()]);
     }
 
+    #[test]
+    fn with_ssl_cli_args_prepends_truststore_args_before_command() {
+        let _lock = config::lock_test_env();
+        let _truststore_lock = TRUSTSTORE_TEST_MUTEX.lock().unwrap();
+        let pem = tempfile::NamedTempFile::new().unwrap();
+        std::fs::write(pem.path(), TEST_CA_CERT_PEM).unwrap();
+
+        std::env::set_var("REQUESTS_CA_BUNDLE", pem.path());
+        std::env::remove_var("SSL_CERT_FILE");
+        std::env::remove_var("CURL_CA_BUNDLE");
+
+        let args = with_ssl_cli_args_if_needed(Path::new("/tmp/cs"), &["review", "file.py"]);
+        assert_eq!(args.len(), 5);
+        assert!(args[..3].iter().all(|a| a.starts_with("-Djavax.net.ssl.")));
+        assert_eq!(&args[3..], ["review", "file.py"]);
+
+        std::fs::remove_file(truststore_path_for_pem(TEST_CA_CERT_PEM.as_bytes())).ok();
+        std::env::remove_var("REQUESTS_CA_BUNDLE");
+    }
+
     #[test]
     fn ssl_cli_args_from_env_returns_empty_without_ca_env_vars() {
         let _lock = config::lock_test_env();
@@ -1029,6 +1055,12 @@ mod tests {
         assert!(!parse_cli_output(output).unwrap().is_empty());
     }
 
+    #[test]
+    fn output_to_string_replaces_invalid_utf8() {
+        assert_eq!(output_to_string(b"ok\n".to_vec()), "ok\n");
+        assert_eq!(output_to_string(vec![b'a', 0xFF, b'b']), "a\u{FFFD}b");
+    }
+
     #[test]
     fn find_git_root_finds_repo_from_subdir() {
         let (_dir, root) = make_git_repo(Some("src"));
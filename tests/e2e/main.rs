@@ -25,6 +25,7 @@ use server_backends::{base_env, create_backend};
 use serde_json::json;
 use std::path::Path;
 use std::process::Command;
+use std::sync::LazyLock;
 use std::time::Duration;
 
 /// Shared setup: prepare backend and create a test repo.
@@ -51,11 +52,20 @@ pub fn setup() -> (
 }
 
 /// Find the release binary or build it.
+///
+/// Resolved once per test process: libtest runs tests in parallel, and
+/// every backend asks for the binary, so this also keeps concurrent tests
+/// from racing into `cargo build --release` at the same time.
 pub fn find_or_build_executable() -> std::path::PathBuf {
+    static EXECUTABLE: LazyLock<std::path::PathBuf> = LazyLock::new(locate_executable);
+    EXECUTABLE.clone()
+}
+
+fn locate_executable() -> std::path::PathBuf {
     if let Ok(path) = std::env::var("CS_MCP_EXECUTABLE") {
         let p = std::path::PathBuf::from(path);
-        if p.exists() {
-            ensure_executable(&p);
+        if let Ok(meta) = std::fs::metadata(&p) {
+            ensure_executable(&p, &meta);
             return p;
         }
     }
@@ -84,19 +94,19 @@ pub fn find_or_build_executable() -> std::path::PathBuf {
     release_binary
 }
 
+/// Add execute bits to `path` if missing, reusing the caller's `meta` so
+/// the binary is only stat'ed once.
 #[cfg(unix)]
-fn ensure_executable(path: &Path) {
+fn ensure_executable(path: &Path, meta: &std::fs::Metadata) {
     use std::os::unix::fs::PermissionsExt;
-    if let Ok(meta) = std::fs::metadata(path) {
-        let mode = meta.permissions().mode();
-        if mode & 0o111 == 0 {
-            let _ = std::fs::set_permissions(path, std::fs::Permissions::from_mode(mode | 0o755));
-        }
+    let mode = meta.permissions().mode();
+    if mode & 0o111 == 0 {
+        let _ = std::fs::set_permissions(path, std::fs::Permissions::from_mode(mode | 0o755));
     }
 }
 
 #[cfg(not(unix))]
-fn ensure_executable(_path: &Path) {}
+fn ensure_executable(_path: &Path, _meta: &std::fs::Metadata) {}
 
 pub fn make_client(command: &[String], env: &[(String, String)], cwd: &Path) -> MCPClient {
     MCPClient::new(
@@ -122,6 +132,29 @@ fn test_server_startup() {
         response.get("result").is_some(),
         "Initialize response should have 'result'"
     );
+    assert!(
+        response.get("error").is_none(),
+        "Initialize response should not have 'error': {response}"
+    );
+}
+
+#[test]
+fn test_client_restart() {
+    let (command, env, repo_dir, _tmp) = setup();
+    let mut client = make_client(&command, &env, &repo_dir);
+
+    assert!(client.start(), "Server should start");
+    client.initialize().expect("Initialize should succeed");
+    client.stop();
+
+    assert!(client.start(), "Server should restart");
+    let response = client
+        .initialize()
+        .expect("Initialize should succeed after restart");
+    assert!(
+        response.get("result").is_some(),
+        "Initialize response should have 'result'"
+    );
 }
 
 #[test]
@@ -3,22 +3,99 @@
 //! Communicates with the MCP server via JSON-RPC over stdio.
 
 use serde_json::{json, Value};
-use std::collections::VecDeque;
+use std::collections::{HashMap, VecDeque};
 use std::io::{BufRead, BufReader, Write};
 use std::process::{Child, Command, Stdio};
 use std::sync::atomic::{AtomicU64, Ordering};
-use std::sync::{Arc, Mutex};
+use std::sync::{Arc, Condvar, Mutex};
 use std::thread;
 use std::time::{Duration, Instant};
 
 static MSG_ID: AtomicU64 = AtomicU64::new(0);
 
+/// The `notifications/initialized` frame never varies, so it is written
+/// pre-serialized instead of being rebuilt for every handshake.
+const INITIALIZED_NOTIFICATION: &[u8] =
+    b"{\"jsonrpc\":\"2.0\",\"method\":\"notifications/initialized\"}\n";
+
+/// Ids only need to be unique across concurrently running clients, which
+/// `fetch_add` guarantees under any ordering.
 fn next_msg_id() -> u64 {
-    MSG_ID.fetch_add(1, Ordering::SeqCst) + 1
+    MSG_ID.fetch_add(1, Ordering::Relaxed) + 1
+}
+
+/// How long `start` watches a freshly spawned server for an immediate
+/// crash. Readiness itself is signalled by the `initialize` response.
+const STARTUP_GRACE: Duration = Duration::from_millis(200);
+
+/// Returns whether `child` is still running once `STARTUP_GRACE` has
+/// elapsed, returning early as soon as it exits.
+fn survives_startup_grace(child: &mut Child) -> bool {
+    let deadline = Instant::now() + STARTUP_GRACE;
+    loop {
+        if !matches!(child.try_wait(), Ok(None)) {
+            return false;
+        }
+        if Instant::now() >= deadline {
+            return true;
+        }
+        thread::sleep(Duration::from_millis(20));
+    }
+}
+
+/// The server only answers `initialize` once it is up, so this budget also
+/// covers startup. The npm backend needs extra time: node downloads,
+/// extracts, then launches the binary. Slow machines can raise the budget
+/// with `CS_MCP_INITIALIZE_TIMEOUT_SECS`.
+fn initialize_timeout() -> Duration {
+    if let Some(secs) = std::env::var("CS_MCP_INITIALIZE_TIMEOUT_SECS")
+        .ok()
+        .and_then(|v| v.parse().ok())
+    {
+        return Duration::from_secs(secs);
+    }
+    if std::env::var("CS_MCP_BACKEND").as_deref() == Ok("npm") {
+        Duration::from_secs(40)
+    } else {
+        Duration::from_secs(30)
+    }
 }
 
-type LineBuffer = Arc<Mutex<VecDeque<String>>>;
-type LineList = Arc<Mutex<Vec<String>>>;
+/// Cap on retained stderr lines. Long-running clients (the stress test
+/// makes hundreds of tool calls) keep only the most recent output.
+const MAX_STDERR_LINES: usize = 10_000;
+
+/// Tool responses can carry large review payloads, so stdout is read in
+/// pipe-sized chunks instead of the default 8 KiB.
+const STDOUT_READ_BUFFER: usize = 64 * 1024;
+
+type LineList = Arc<Mutex<VecDeque<String>>>;
+
+/// Responses keyed by JSON-RPC id. `arrived` is signalled on every insert,
+/// and once more when stdout closes, so waiters wake as soon as their
+/// response lands or can no longer arrive instead of polling.
+#[derive(Default)]
+struct Responses {
+    inbox: Mutex<Inbox>,
+    arrived: Condvar,
+}
+
+#[derive(Default)]
+struct Inbox {
+    by_id: HashMap<u64, Value>,
+    /// Set when the server's stdout reaches EOF.
+    closed: bool,
+}
+
+/// The id of a response to one of our requests. Server-initiated requests
+/// and notifications carry a `method` and are never matched, even when
+/// their own id happens to collide with one of ours.
+fn response_id(message: &Value) -> Option<u64> {
+    if message.get("method").is_some() {
+        return None;
+    }
+    message.get("id")?.as_u64()
+}
 
 fn spawn_line_reader<R: std::io::Read + Send + 'static>(
     stream: R,
@@ -38,7 +115,11 @@ pub struct MCPClient {
     env: Vec<(String, String)>,
     cwd: Option<String>,
     process: Option<Child>,
-    responses: LineBuffer,
+    /// Set once the handshake completes, so repeated `initialize` calls on
+    /// the same server are free. Cleared whenever a process is attached or
+    /// stopped.
+    initialize_response: Option<Value>,
+    responses: Arc<Responses>,
     stderr_lines: LineList,
 }
 
@@ -49,8 +130,9 @@ impl MCPClient {
             env,
             cwd,
             process: None,
-            responses: Arc::new(Mutex::new(VecDeque::new())),
-            stderr_lines: Arc::new(Mutex::new(Vec::new())),
+            initialize_response: None,
+            responses: Arc::new(Responses::default()),
+            stderr_lines: Arc::new(Mutex::new(VecDeque::new())),
         }
     }
 
@@ -84,32 +166,55 @@ impl MCPClient {
     }
 
     fn attach_to_process(&mut self, mut child: Child) -> bool {
+        // A new process has not been handshaken yet, and gets its own inbox
+        // so the previous process's reader, which marks its inbox closed at
+        // EOF, cannot fail requests to this one.
+        self.initialize_response = None;
+        self.responses = Arc::new(Responses::default());
         self.spawn_stdout_reader(child.stdout.take().expect("stdout"));
         self.spawn_stderr_reader(child.stderr.take().expect("stderr"));
-        // npm backend needs extra time: node downloads, extracts, then launches the binary
-        let wait_secs = if std::env::var("CS_MCP_BACKEND").as_deref() == Ok("npm") {
-            10
-        } else {
-            1
-        };
-        thread::sleep(Duration::from_secs(wait_secs));
-        let alive = matches!(child.try_wait(), Ok(None));
+        let alive = survives_startup_grace(&mut child);
         if !alive {
-            let stderr = self.stderr_lines.lock().unwrap().join("\n");
+            let stderr = self.get_stderr();
             eprintln!("MCP server exited immediately. stderr:\n{stderr}");
         }
         self.process = Some(child);
         alive
     }
 
+    /// Each stdout frame is parsed exactly once, straight from the raw
+    /// bytes on the reader thread, and filed under its response id. Frames
+    /// without one (log messages and other server-initiated traffic) are
+    /// not used by any test and are dropped, so they can never be mistaken
+    /// for a response.
     fn spawn_stdout_reader(&self, stdout: std::process::ChildStdout) {
-        let buf = Arc::clone(&self.responses);
-        spawn_line_reader(stdout, move |line| buf.lock().unwrap().push_back(line));
+        let responses = Arc::clone(&self.responses);
+        thread::spawn(move || {
+            let mut reader = BufReader::with_capacity(STDOUT_READ_BUFFER, stdout);
+            let mut frame = Vec::new();
+            while matches!(reader.read_until(b'\n', &mut frame), Ok(n) if n > 0) {
+                if let Ok(message) = serde_json::from_slice::<Value>(&frame) {
+                    if let Some(id) = response_id(&message) {
+                        responses.inbox.lock().unwrap().by_id.insert(id, message);
+                        responses.arrived.notify_all();
+                    }
+                }
+                frame.clear();
+            }
+            responses.inbox.lock().unwrap().closed = true;
+            responses.arrived.notify_all();
+        });
     }
 
     fn spawn_stderr_reader(&self, stderr: std::process::ChildStderr) {
         let buf = Arc::clone(&self.stderr_lines);
-        spawn_line_reader(stderr, move |line| buf.lock().unwrap().push(line));
+        spawn_line_reader(stderr, move |line| {
+            let mut lines = buf.lock().unwrap();
+            if lines.len() == MAX_STDERR_LINES {
+                lines.pop_front();
+            }
+            lines.push_back(line);
+        });
     }
 
     pub fn send_request(
@@ -125,69 +230,77 @@ impl MCPClient {
             "method": method,
             "params": params,
         }))?;
-        self.await_response(id, timeout)
+        self.await_response(method, id, timeout)
     }
 
     fn write_message(&mut self, message: &Value) -> Result<(), String> {
-        let child = self.process.as_mut().ok_or("No process")?;
-        let stdin = child.stdin.as_mut().ok_or("No stdin")?;
         let mut msg = serde_json::to_string(message).map_err(|e| e.to_string())?;
         msg.push('\n');
+        self.write_raw(msg.as_bytes())
+    }
+
+    fn write_raw(&mut self, frame: &[u8]) -> Result<(), String> {
+        let child = self.process.as_mut().ok_or("No process")?;
+        let stdin = child.stdin.as_mut().ok_or("No stdin")?;
         stdin
-            .write_all(msg.as_bytes())
+            .write_all(frame)
             .map_err(|e| format!("Write failed: {e}"))?;
         stdin.flush().map_err(|e| format!("Flush failed: {e}"))
     }
 
-    fn await_response(&self, expected_id: u64, timeout: Duration) -> Result<Value, String> {
-        let start = Instant::now();
-        let mut stashed: Vec<String> = Vec::new();
+    fn await_response(
+        &self,
+        method: &str,
+        expected_id: u64,
+        timeout: Duration,
+    ) -> Result<Value, String> {
+        let deadline = Instant::now() + timeout;
+        let mut inbox = self.responses.inbox.lock().unwrap();
         loop {
-            let line = self.responses.lock().unwrap().pop_front();
-            if let Some(line) = line {
-                match self.try_match_response(&line, expected_id) {
-                    Some(val) => {
-                        self.restore_stashed(stashed);
-                        return Ok(val);
-                    }
-                    None => stashed.push(line),
-                }
+            if let Some(message) = inbox.by_id.remove(&expected_id) {
+                return Ok(message);
             }
-            if start.elapsed() > timeout {
-                self.restore_stashed(stashed);
-                let tail: String = self
-                    .get_stderr()
-                    .lines()
-                    .rev()
-                    .take(10)
-                    .collect::<Vec<_>>()
-                    .join("\n");
+            if inbox.closed {
+                drop(inbox);
                 return Err(format!(
-                    "Timeout waiting for response (id={expected_id}). Recent stderr:\n{tail}"
+                    "Server closed stdout before answering {method} (id={expected_id}). \
+                     Recent stderr:\n{}",
+                    self.stderr_tail()
                 ));
             }
-            thread::sleep(Duration::from_millis(10));
-        }
-    }
-
-    fn try_match_response(&self, line: &str, expected_id: u64) -> Option<Value> {
-        let val = serde_json::from_str::<Value>(line).ok()?;
-        if val.get("id").and_then(|v| v.as_u64()) == Some(expected_id) {
-            Some(val)
-        } else {
-            None
+            let remaining = deadline.saturating_duration_since(Instant::now());
+            if remaining.is_zero() {
+                drop(inbox);
+                return Err(format!(
+                    "Timeout waiting for {method} response (id={expected_id}) after {:.1}s. \
+                     Recent stderr:\n{}",
+                    timeout.as_secs_f64(),
+                    self.stderr_tail()
+                ));
+            }
+            inbox = self
+                .responses
+                .arrived
+                .wait_timeout(inbox, remaining)
+                .unwrap()
+                .0;
         }
     }
 
-    fn restore_stashed(&self, stashed: Vec<String>) {
-        if !stashed.is_empty() {
-            let mut buf = self.responses.lock().unwrap();
-            for s in stashed.into_iter().rev() {
-                buf.push_front(s);
-            }
-        }
+    /// The last few stderr lines, newest first, for error messages.
+    fn stderr_tail(&self) -> String {
+        self.stderr_lines
+            .lock()
+            .unwrap()
+            .iter()
+            .rev()
+            .take(10)
+            .map(String::as_str)
+            .collect::<Vec<_>>()
+            .join("\n")
     }
 
+    #[allow(dead_code)]
     pub fn send_notification(&mut self, method: &str, params: Option<Value>) {
         let mut notification = json!({"jsonrpc": "2.0", "method": method});
         if let Some(p) = params {
@@ -210,6 +323,9 @@ impl MCPClient {
     }
 
     pub fn initialize(&mut self) -> Result<Value, String> {
+        if let Some(ref response) = self.initialize_response {
+            return Ok(response.clone());
+        }
         let response = self.send_request(
             "initialize",
             json!({
@@ -217,11 +333,10 @@ impl MCPClient {
                 "capabilities": {},
                 "clientInfo": {"name": "integration-test-client", "version": "1.0.0"},
             }),
-            Duration::from_secs(30),
+            initialize_timeout(),
         )?;
-        thread::sleep(Duration::from_millis(200));
-        self.send_notification("notifications/initialized", None);
-        thread::sleep(Duration::from_millis(300));
+        let _ = self.write_raw(INITIALIZED_NOTIFICATION);
+        self.initialize_response = Some(response.clone());
         Ok(response)
     }
 
@@ -232,10 +347,15 @@ impl MCPClient {
             let _ = child.wait();
         }
         self.process = None;
+        self.initialize_response = None;
     }
 
     pub fn get_stderr(&self) -> String {
-        self.stderr_lines.lock().unwrap().join("\n")
+        self.stderr_lines
+            .lock()
+            .unwrap()
+            .make_contiguous()
+            .join("\n")
     }
 }
 
@@ -2,48 +2,116 @@
 
 use regex::Regex;
 use serde_json::Value;
+use std::sync::LazyLock;
 
 /// Extract the actual result text from an MCP response.
 pub fn extract_result_text(response: &Value) -> String {
-    if let Some(text) = extract_from_content(response) {
-        return text;
-    }
-    extract_from_structured_content(response).unwrap_or_default()
+    let Some(result) = response.get("result") else {
+        return String::new();
+    };
+    extract_from_content(result)
+        .or_else(|| extract_from_structured_content(result))
+        .map(String::from)
+        .unwrap_or_default()
 }
 
-fn extract_from_content(response: &Value) -> Option<String> {
-    let first = response
-        .get("result")?
+fn extract_from_content(result: &Value) -> Option<&str> {
+    result
         .get("content")?
         .as_array()?
-        .first()?;
-    first.get("text")?.as_str().map(String::from)
+        .first()?
+        .get("text")?
+        .as_str()
 }
 
-fn extract_from_structured_content(response: &Value) -> Option<String> {
-    response
-        .get("result")?
-        .get("structuredContent")?
-        .get("result")?
-        .as_str()
-        .map(String::from)
+fn extract_from_structured_content(result: &Value) -> Option<&str> {
+    result.get("structuredContent")?.get("result")?.as_str()
 }
 
-/// Extract Code Health score from response text.
-pub fn extract_code_health_score(response_text: &str) -> Option<f64> {
-    let text_lower = response_text.to_lowercase();
-    let patterns = [
+/// Keywords that indicate a TLS / certificate failure in a tool response,
+/// compiled once into a single case-insensitive alternation.
+static SSL_ERROR_RE: LazyLock<Regex> =
+    LazyLock::new(|| Regex::new(r"(?i)ssl|tls|certificate|handshake").unwrap());
+
+/// Error messages sit at the start or the end of a tool response, so only
+/// this many bytes at each end are scanned. Keeps keyword checks cheap on
+/// large review payloads.
+const ERROR_SCAN_WINDOW: usize = 4096;
+
+/// True when the response text mentions a TLS / certificate failure.
+pub fn has_ssl_error(response_text: &str) -> bool {
+    scan_windows(response_text)
+        .iter()
+        .any(|window| SSL_ERROR_RE.is_match(window))
+}
+
+/// Head and tail of `text`, each at most `ERROR_SCAN_WINDOW` bytes. Short
+/// texts are returned whole as the head with an empty tail.
+fn scan_windows(text: &str) -> [&str; 2] {
+    if text.len() <= 2 * ERROR_SCAN_WINDOW {
+        return [text, ""];
+    }
+    let mut head_end = ERROR_SCAN_WINDOW;
+    while !text.is_char_boundary(head_end) {
+        head_end -= 1;
+    }
+    let mut tail_start = text.len() - ERROR_SCAN_WINDOW;
+    while !text.is_char_boundary(tail_start) {
+        tail_start += 1;
+    }
+    [&text[..head_end], &text[tail_start..]]
+}
+
+/// Score patterns in priority order, compiled once per test process.
+static SCORE_PATTERNS: LazyLock<[Regex; 3]> = LazyLock::new(|| {
+    [
         r"code health score[:\s]+([0-9]+\.?[0-9]*)",
         r"score[:\s]+([0-9]+\.?[0-9]*)",
         r"health[:\s]+([0-9]+\.?[0-9]*)",
-    ];
+    ]
+    .map(|p| Regex::new(p).unwrap())
+});
 
-    patterns
+/// Extract Code Health score from response text.
+pub fn extract_code_health_score(response_text: &str) -> Option<f64> {
+    let text_lower = response_text.to_lowercase();
+    SCORE_PATTERNS
         .iter()
-        .filter_map(|p| Regex::new(p).ok())
-        .find_map(|re| parse_first_capture(&re, &text_lower))
+        .find_map(|re| parse_first_capture(re, &text_lower))
 }
 
 fn parse_first_capture(re: &Regex, text: &str) -> Option<f64> {
     re.captures(text)?.get(1)?.as_str().parse().ok()
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn scan_windows_returns_short_text_whole() {
+        let text = "a".repeat(2 * ERROR_SCAN_WINDOW);
+        assert_eq!(scan_windows(&text), [text.as_str(), ""]);
+    }
+
+    #[test]
+    fn scan_windows_backs_off_multibyte_chars_at_both_edges() {
+        // '€' is three bytes; place one across each window edge.
+        let head = "a".repeat(ERROR_SCAN_WINDOW - 1);
+        let tail = "c".repeat(ERROR_SCAN_WINDOW - 2);
+        let text = format!("{head}€{}€{tail}", "b".repeat(2000));
+        assert!(!text.is_char_boundary(ERROR_SCAN_WINDOW));
+        assert!(!text.is_char_boundary(text.len() - ERROR_SCAN_WINDOW));
+
+        assert_eq!(scan_windows(&text), [head.as_str(), tail.as_str()]);
+    }
+
+    #[test]
+    fn has_ssl_error_checks_head_and_tail_only() {
+        let pad = "x".repeat(5000);
+        assert!(has_ssl_error(&format!("TLS handshake failed{pad}{pad}")));
+        assert!(has_ssl_error(&format!("{pad}{pad}bad certificate")));
+        // Documented miss: keywords deep in the middle are not scanned.
+        assert!(!has_ssl_error(&format!("{pad}certificate{pad}")));
+    }
+}
@@ -487,8 +487,13 @@ impl ServerBackend for NpmBackend {
 // ---------------------------------------------------------------------------
 
 /// Build the base environment from the current process env.
+///
+/// The process env is snapshotted once and each caller gets its own copy
+/// to modify. No test changes the process env, so the snapshot never goes
+/// stale.
 pub fn base_env() -> HashMap<String, String> {
-    env::vars().collect()
+    static BASE_ENV: LazyLock<HashMap<String, String>> = LazyLock::new(|| env::vars().collect());
+    BASE_ENV.clone()
 }
 
 /// Find an executable on PATH (simplified `which`).
@@ -2,7 +2,7 @@
 pub use crate::file_utils::{create_git_repo, create_temp_dir};
 pub use crate::fixtures::get_sample_files;
 pub use crate::mcp_client::MCPClient;
-pub use crate::response_parsers::{extract_code_health_score, extract_result_text};
+pub use crate::response_parsers::{extract_code_health_score, extract_result_text, has_ssl_error};
 pub use crate::server_backends::{
     base_env, create_backend, docker_ca_bundle, docker_config_dir, fake_server_bind_host,
     fake_server_url_host, is_docker, skip_if_docker, ServerBackend,
@@ -13,6 +13,15 @@ pub use serde_json::json;
 pub use std::path::Path;
 pub use std::time::Duration;
 
+/// Variables that point the server (or the CLI it runs) at a CA bundle.
+const CA_BUNDLE_VARS: [&str; 3] = ["REQUESTS_CA_BUNDLE", "SSL_CERT_FILE", "CURL_CA_BUNDLE"];
+
+/// Whether `key` selects a CA bundle. SSL tests drop all of these from the
+/// base env before setting the one they exercise.
+pub fn is_ca_bundle_var(key: &str) -> bool {
+    CA_BUNDLE_VARS.contains(&key)
+}
+
 pub fn use_isolated_config_dir(
     env: &mut Vec<(String, String)>,
     repo_dir: &Path,
@@ -8,8 +8,9 @@
 use super::*;
 
 use serde_json::json;
-use std::io::Write;
+use std::io::{BufRead, BufReader, Write};
 use std::process::{Command as ProcessCommand, Stdio};
+use std::sync::mpsc;
 use std::time::{Duration, Instant};
 
 const EXIT_TIMEOUT_SECS: u64 = 10;
@@ -33,9 +34,18 @@ fn shutdown_setup() -> (Vec<String>, Vec<(String, String)>, tempfile::TempDir) {
 // Helpers
 // ---------------------------------------------------------------------------
 
-fn spawn_server(command: &[String], env: &[(String, String)], cwd: &Path) -> std::process::Child {
+/// A spawned server whose stdout and stderr are drained on background
+/// threads from the start, so a chatty server can never block on a full
+/// pipe. Stdout lines are forwarded so tests can wait for responses.
+struct Server {
+    child: std::process::Child,
+    stdout: mpsc::Receiver<String>,
+    stderr: std::thread::JoinHandle<String>,
+}
+
+fn spawn_server(command: &[String], env: &[(String, String)], cwd: &Path) -> Server {
     let (program, args) = command.split_first().expect("command must not be empty");
-    ProcessCommand::new(program)
+    let mut child = ProcessCommand::new(program)
         .args(args)
         .envs(env.iter().map(|(k, v)| (k.as_str(), v.as_str())))
         .current_dir(cwd)
@@ -43,7 +53,46 @@ fn spawn_server(command: &[String], env: &[(String, String)], cwd: &Path) -> std
         .stdout(Stdio::piped())
         .stderr(Stdio::piped())
         .spawn()
-        .expect("failed to spawn server process")
+        .expect("failed to spawn server process");
+    let stdout = child.stdout.take().expect("stdout should be piped");
+    let stderr = child.stderr.take().expect("stderr should be piped");
+    let (tx, rx) = mpsc::channel();
+    std::thread::spawn(move || {
+        for line in BufReader::new(stdout).lines().map_while(Result::ok) {
+            if tx.send(line).is_err() {
+                break;
+            }
+        }
+    });
+    Server {
+        child,
+        stdout: rx,
+        stderr: std::thread::spawn(move || read_all_lossy(stderr)),
+    }
+}
+
+/// Block until the server answers the initialize request, which proves it
+/// has read and handled it.
+fn wait_for_initialize_response(server: &Server) {
+    let deadline = Instant::now() + Duration::from_secs(EXIT_TIMEOUT_SECS);
+    loop {
+        let remaining = deadline.saturating_duration_since(Instant::now());
+        let line = server
+            .stdout
+            .recv_timeout(remaining)
+            .expect("server should answer the initialize request");
+        let is_response = serde_json::from_str::<serde_json::Value>(&line)
+            .is_ok_and(|m| m.get("id") == Some(&json!(1)) && m.get("method").is_none());
+        if is_response {
+            return;
+        }
+    }
+}
+
+fn read_all_lossy(mut stream: impl std::io::Read) -> String {
+    let mut buf = Vec::new();
+    stream.read_to_end(&mut buf).ok();
+    String::from_utf8_lossy(&buf).into_owned()
 }
 
 fn send_message(child: &mut std::process::Child, message: &serde_json::Value) {
@@ -53,22 +102,16 @@ fn send_message(child: &mut std::process::Child, message: &serde_json::Value) {
     stdin.flush().expect("failed to flush stdin");
 }
 
-fn wait_for_exit(mut child: std::process::Child) -> (Option<i32>, String) {
+fn wait_for_exit(server: Server) -> (Option<i32>, String) {
+    let Server {
+        mut child, stderr, ..
+    } = server;
     let timeout = Duration::from_secs(EXIT_TIMEOUT_SECS);
     let start = Instant::now();
     loop {
         match child.try_wait() {
             Ok(Some(status)) => {
-                let stderr_bytes = child
-                    .stderr
-                    .take()
-                    .map(|mut e| {
-                        let mut buf = Vec::new();
-                        std::io::Read::read_to_end(&mut e, &mut buf).ok();
-                        buf
-                    })
-                    .unwrap_or_default();
-                let stderr = String::from_utf8_lossy(&stderr_bytes).into_owned();
+                let stderr = stderr.join().unwrap_or_default();
                 return (status.code(), stderr);
             }
             Ok(None) if start.elapsed() < timeout => {
@@ -83,9 +126,9 @@ fn wait_for_exit(mut child: std::process::Child) -> (Option<i32>, String) {
     }
 }
 
-fn close_stdin_and_wait(mut child: std::process::Child) -> (Option<i32>, String) {
-    drop(child.stdin.take());
-    wait_for_exit(child)
+fn close_stdin_and_wait(mut server: Server) -> (Option<i32>, String) {
+    drop(server.child.stdin.take());
+    wait_for_exit(server)
 }
 
 fn initialize_request() -> serde_json::Value {
@@ -129,38 +172,37 @@ fn check_clean_exit(exit_code: Option<i32>, stderr: &str, scenario: &str) -> boo
 #[test]
 pub fn test_stdin_closed_before_any_input() {
     let (command, env, temp_dir) = shutdown_setup();
-    let child = spawn_server(&command, &env, temp_dir.path());
+    let server = spawn_server(&command, &env, temp_dir.path());
 
     std::thread::sleep(Duration::from_millis(300));
 
-    let (exit_code, stderr) = close_stdin_and_wait(child);
+    let (exit_code, stderr) = close_stdin_and_wait(server);
     check_clean_exit(exit_code, &stderr, "stdin closed before any input");
 }
 
 #[test]
 pub fn test_stdin_closed_after_initialize_request() {
     let (command, env, temp_dir) = shutdown_setup();
-    let mut child = spawn_server(&command, &env, temp_dir.path());
+    let mut server = spawn_server(&command, &env, temp_dir.path());
 
-    send_message(&mut child, &initialize_request());
-    std::thread::sleep(Duration::from_millis(500));
+    send_message(&mut server.child, &initialize_request());
+    wait_for_initialize_response(&server);
 
-    let (exit_code, stderr) = close_stdin_and_wait(child);
+    let (exit_code, stderr) = close_stdin_and_wait(server);
     check_clean_exit(exit_code, &stderr, "stdin closed after initialize request");
 }
 
 #[test]
 pub fn test_stdin_closed_after_full_handshake() {
     let (command, env, temp_dir) = shutdown_setup();
-    let mut child = spawn_server(&command, &env, temp_dir.path());
+    let mut server = spawn_server(&command, &env, temp_dir.path());
 
-    send_message(&mut child, &initialize_request());
-    std::thread::sleep(Duration::from_millis(300));
+    send_message(&mut server.child, &initialize_request());
+    wait_for_initialize_response(&server);
 
-    send_message(&mut child, &initialized_notification());
-    std::thread::sleep(Duration::from_millis(300));
+    send_message(&mut server.child, &initialized_notification());
 
-    let (exit_code, stderr) = close_stdin_and_wait(child);
+    let (exit_code, stderr) = close_stdin_and_wait(server);
     check_clean_exit(exit_code, &stderr, "stdin closed after full handshake");
 }
 
@@ -173,19 +215,19 @@ fn is_npm_backend() -> bool {
 }
 
 #[allow(unused_mut)]
-fn sigterm_and_wait(mut child: std::process::Child) -> (Option<i32>, String) {
+fn sigterm_and_wait(mut server: Server) -> (Option<i32>, String) {
     #[cfg(unix)]
     {
         unsafe {
-            libc::kill(child.id() as i32, libc::SIGTERM);
+            libc::kill(server.child.id() as i32, libc::SIGTERM);
         }
     }
     #[cfg(not(unix))]
     {
-        let _ = child.kill();
+        let _ = server.child.kill();
     }
 
-    wait_for_exit(child)
+    wait_for_exit(server)
 }
 
 #[test]
@@ -196,10 +238,10 @@ pub fn test_sigterm_before_any_input() {
     }
 
     let (command, env, temp_dir) = shutdown_setup();
-    let child = spawn_server(&command, &env, temp_dir.path());
+    let server = spawn_server(&command, &env, temp_dir.path());
     std::thread::sleep(Duration::from_millis(300));
 
-    let (exit_code, stderr) = sigterm_and_wait(child);
+    let (exit_code, stderr) = sigterm_and_wait(server);
     check_clean_exit(exit_code, &stderr, "SIGTERM before any input");
 }
 
@@ -211,14 +253,13 @@ pub fn test_sigterm_after_full_handshake() {
     }
 
     let (command, env, temp_dir) = shutdown_setup();
-    let mut child = spawn_server(&command, &env, temp_dir.path());
+    let mut server = spawn_server(&command, &env, temp_dir.path());
 
-    send_message(&mut child, &initialize_request());
-    std::thread::sleep(Duration::from_millis(300));
+    send_message(&mut server.child, &initialize_request());
+    wait_for_initialize_response(&server);
 
-    send_message(&mut child, &initialized_notification());
-    std::thread::sleep(Duration::from_millis(300));
+    send_message(&mut server.child, &initialized_notification());
 
-    let (exit_code, stderr) = sigterm_and_wait(child);
+    let (exit_code, stderr) = sigterm_and_wait(server);
     check_clean_exit(exit_code, &stderr, "SIGTERM after full handshake");
 }
@@ -90,7 +90,7 @@ pub fn test_api_fails_without_ca_bundle() {
 
     let env_without_ca: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .collect();
 
     let result = call_select_project(&command, &env_without_ca, &repo_dir);
@@ -119,7 +119,7 @@ pub fn test_api_fails_with_invalid_ca_bundle_path() {
 
     let env_bad_ca: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .chain(std::iter::once((
             "REQUESTS_CA_BUNDLE".to_string(),
             "/nonexistent/path/to/ca-bundle.pem".to_string(),
@@ -76,7 +76,7 @@ fn path_setup() -> TestSetup {
 
 fn env_with_ca_bundle(base: &[(String, String)], ca_path: &str) -> Vec<(String, String)> {
     base.iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .cloned()
         .chain(std::iter::once((
             "REQUESTS_CA_BUNDLE".to_string(),
@@ -127,7 +127,7 @@ pub fn test_baseline_fails_without_ca_bundle() {
     let env: Vec<(String, String)> = s
         .env
         .iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .cloned()
         .collect();
 
@@ -227,7 +227,7 @@ pub fn test_set_config_ca_bundle_applies_immediately() {
     let env: Vec<(String, String)> = s
         .env
         .iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .cloned()
         .collect();
 
@@ -117,18 +117,14 @@ pub fn test_cli_connectivity_fails_without_ca_bundle() {
 
     let env_without_ca: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .collect();
 
     let result = call_verify_installation(&command, &env_without_ca, &repo_dir);
     let lower = result.to_lowercase();
 
     assert!(
-        lower.contains("[fail] cli connectivity")
-            || lower.contains("ssl")
-            || lower.contains("tls")
-            || lower.contains("certificate")
-            || lower.contains("handshake"),
+        lower.contains("[fail] cli connectivity") || has_ssl_error(&result),
         "CLI connectivity should fail without CA bundle, got: {result}"
     );
     assert!(
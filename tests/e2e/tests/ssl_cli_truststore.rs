@@ -9,27 +9,10 @@
 
 use super::*;
 use std::process::Command;
+use std::sync::LazyLock;
 
-const TEST_CA_CERT_PEM: &str = "-----BEGIN CERTIFICATE-----\n\
-    MIIDPzCCAiegAwIBAgIUdGj465l77xx7Je8KqOESIqx9zXYwDQYJKoZIhvcNAQEL\n\
-    BQAwTzELMAkGA1UEBhMCVVMxDTALBgNVBAgMBFRlc3QxDTALBgNVBAcMBFRlc3Qx\n\
-    EDAOBgNVBAoMB1Rlc3QgQ0ExEDAOBgNVBAMMB1Rlc3QgQ0EwHhcNMjYwMTE2MDky\n\
-    OTQ5WhcNMjcwMTE2MDkyOTQ5WjBPMQswCQYDVQQGEwJVUzENMAsGA1UECAwEVGVz\n\
-    dDENMAsGA1UEBwwEVGVzdDEQMA4GA1UECgwHVGVzdCBDQTEQMA4GA1UEAwwHVGVz\n\
-    dCBDQTCCASIwDQYJKoZIhvcNAQEBBQADggEPADCCAQoCggEBAMqoClSXXim/fiI9\n\
-    Lc3X/4D4rHK6cWAnKVPA+CetSJiGrMrfeJZMSTWUv19M8aKlmbZsQxN4X4neycWE\n\
-    UxH9y3XaqV9grmGvutTgw98t6fhawevGrjmcA+ygQ5S37reRQOHtc9ob51b8b9Rr\n\
-    nyE8qIU2dkZ115VpFN+/woG2LG23iGj2dJ3AaZc/R8X0UQu5tQCDwTOeO/zMWPGG\n\
-    xjzDpnFs4u7IAwPECEgEuxHH8PHapUoc0d+Aq/wBKM015qdohoaydrztzXp6DKJ5\n\
-    RBv/cn+lTpFdvJQS0CceIo+hOUa46ONq63VM3SQhT7enOWToONBxrZpof18bITFd\n\
-    2h4XxoMCAwEAAaMTMBEwDwYDVR0TAQH/BAUwAwEB/zANBgkqhkiG9w0BAQsFAAOC\n\
-    AQEAHDWTjJILOtrCBRFksVyvniUGFR8ioz2cE4R8xcKAFxNOPKLuxwm+ilbUBX3A\n\
-    8VOCJjR6IimsLMhAUEi5FGDiVVhOwIp1+pULEigTG7r72yOCr2xnw8NrX9UbJNnx\n\
-    rlyCjEN9URBpriiGGegixH6AoLVW0SjEsJ7CgfqmfWzKU+nsPIunvePtFhSw5jHC\n\
-    mHwYTxYcxYW33TK9qQxs119A9+qG5Z+cJlDtYrfHirHwPZQeuQ25jhKE5FUUiuiq\n\
-    iblIIstcPF4n6wQ0ieNajmj5nHXQEypkek8D/ANbwwhlVQ3u/hldcAyj4qD7G5oJ\n\
-    sC0Nc9QdNQt5Tos5Je5S7CWL0w==\n\
-    -----END CERTIFICATE-----\n";
+/// CA certificate shared with the unit tests in `src/http.rs`.
+const TEST_CA_CERT_PATH: &str = concat!(env!("CARGO_MANIFEST_DIR"), "/tests/fixtures/test_ca.pem");
 
 const FAKE_CLI_RS: &str = r##"use std::env;
 use std::path::Path;
@@ -83,23 +66,44 @@ fn main() {
 // Helpers
 // ---------------------------------------------------------------------------
 
-/// Compile the fake CLI from embedded Rust source and return its path.
+/// Path to the fake CLI binary, shared by every test in this module.
+///
+/// The source never changes, so it is compiled once per test process into
+/// cargo's scratch dir for integration tests instead of once per test.
+fn fake_cli() -> std::path::PathBuf {
+    static FAKE_CLI: LazyLock<std::path::PathBuf> = LazyLock::new(|| {
+        let dir = Path::new(env!("CARGO_TARGET_TMPDIR")).join("ssl_cli_truststore");
+        std::fs::create_dir_all(&dir).expect("create fake CLI dir");
+        make_fake_cli(&dir)
+    });
+    FAKE_CLI.clone()
+}
+
+/// Compile the fake CLI from embedded Rust source into `dir` and return its path.
+///
+/// `dir` persists across runs, and another test process may be executing
+/// the binary at the same time. So this process builds under names unique
+/// to it and renames the result into place, and nobody ever sees a
+/// half-written `cs` or has it overwritten while running.
 fn make_fake_cli(dir: &Path) -> std::path::PathBuf {
-    let source = dir.join("fake_cs.rs");
+    let pid = std::process::id();
+    let source = dir.join(format!("fake_cs_{pid}.rs"));
     std::fs::write(&source, FAKE_CLI_RS).expect("write fake CLI source");
 
     let binary_name = if cfg!(windows) { "cs.exe" } else { "cs" };
     let output_path = dir.join(binary_name);
+    let staging_path = dir.join(format!("{binary_name}.{pid}.tmp"));
 
     let result = Command::new("rustc")
         .args([
             source.to_str().expect("source path"),
             "-O",
             "-o",
-            output_path.to_str().expect("output path"),
+            staging_path.to_str().expect("staging path"),
         ])
         .output()
         .expect("rustc should execute");
+    let _ = std::fs::remove_file(&source);
 
     assert!(
         result.status.success(),
@@ -107,6 +111,13 @@ fn make_fake_cli(dir: &Path) -> std::path::PathBuf {
         String::from_utf8_lossy(&result.stderr)
     );
 
+    // Windows refuses to replace an executable that is running; the binary
+    // already there was built from the same source, so use it.
+    if let Err(e) = std::fs::rename(&staging_path, &output_path) {
+        let _ = std::fs::remove_file(&staging_path);
+        assert!(output_path.exists(), "Failed to install fake CLI: {e}");
+    }
+
     output_path
 }
 
@@ -128,12 +139,11 @@ fn call_score_tool(command: &[String], env: &[(String, String)], repo_dir: &Path
     extract_result_text(&response)
 }
 
-/// Build common test state: temp dir, git repo, fake CLI binary, cert file, and env.
+/// Build common test state: temp dir, git repo, fake CLI binary, and env.
 fn local_setup() -> (
     Vec<String>,
     Vec<(String, String)>,
     std::path::PathBuf,
-    std::path::PathBuf,
     tempfile::TempDir,
 ) {
     let executable = find_or_build_executable();
@@ -143,10 +153,7 @@ fn local_setup() -> (
     let sample_files = get_sample_files();
     let repo_dir = create_git_repo(temp_dir.path(), &sample_files).expect("create git repo");
 
-    let fake_cli = make_fake_cli(temp_dir.path());
-
-    let cert_path = temp_dir.path().join("internal-ca.pem");
-    std::fs::write(&cert_path, TEST_CA_CERT_PEM).expect("write cert PEM");
+    let fake_cli = fake_cli();
 
     let base = base_env();
     let env_map = backend.get_env(&base, &repo_dir);
@@ -165,7 +172,7 @@ fn local_setup() -> (
         .collect();
 
     let command = backend.get_command(&repo_dir);
-    (command, env, repo_dir, cert_path, temp_dir)
+    (command, env, repo_dir, temp_dir)
 }
 
 // ---------------------------------------------------------------------------
@@ -178,14 +185,14 @@ pub fn test_truststore_args_are_injected() {
     if is_docker() {
         return skip_if_docker("fake CLI binary not available in container");
     }
-    let (command, env, repo_dir, cert_path, _tmp) = local_setup();
+    let (command, env, repo_dir, _tmp) = local_setup();
 
     let env: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .chain(std::iter::once((
             "REQUESTS_CA_BUNDLE".to_string(),
-            cert_path.to_string_lossy().to_string(),
+            TEST_CA_CERT_PATH.to_string(),
         )))
         .collect();
 
@@ -202,11 +209,11 @@ pub fn test_truststore_args_missing_without_cert() {
     if is_docker() {
         return skip_if_docker("fake CLI binary not available in container");
     }
-    let (command, env, repo_dir, _cert_path, _tmp) = local_setup();
+    let (command, env, repo_dir, _tmp) = local_setup();
 
     let env: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .collect();
 
     let result = call_score_tool(&command, &env, &repo_dir);
@@ -225,11 +232,11 @@ pub fn test_truststore_args_not_injected_when_ca_bundle_path_invalid() {
     if is_docker() {
         return skip_if_docker("fake CLI binary not available in container");
     }
-    let (command, env, repo_dir, _cert_path, _tmp) = local_setup();
+    let (command, env, repo_dir, _tmp) = local_setup();
 
     let env: Vec<(String, String)> = env
         .into_iter()
-        .filter(|(k, _)| k != "REQUESTS_CA_BUNDLE" && k != "SSL_CERT_FILE" && k != "CURL_CA_BUNDLE")
+        .filter(|(k, _)| !is_ca_bundle_var(k))
         .chain(std::iter::once((
             "REQUESTS_CA_BUNDLE".to_string(),
             "/nonexistent/path/to/ca-bundle.pem".to_string(),